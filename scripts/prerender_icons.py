@@ -0,0 +1,40 @@
+################################################################################
+# FILE: prerender_icons.py
+# DESCRIPTION: Rasterizes the SVG icon set to PNGs so the display never needs
+#              CairoSVG at runtime.
+# AUTHOR: MSCRNT LLC.
+#
+# THIS CODE IS PROPRIETARY PROPERTY OF MSCRNT LLC.
+################################################################################
+
+import os
+import sys
+import cairosvg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+from icons import PNG_SUBDIR, prerendered_path  # ✅ Same <name>_<size>.png naming the display code loads
+
+ICON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../assets/icons"))
+PNG_DIR = os.path.join(ICON_DIR, PNG_SUBDIR)
+
+# Sizes the display code renders icons at
+ICON_SIZES = (48, 40)  # display_manager header, image_generator weather icons
+
+
+def prerender_icons():
+    """Renders every SVG in assets/icons to assets/icons/png/<name>_<size>.png."""
+    os.makedirs(PNG_DIR, exist_ok=True)
+
+    for file_name in sorted(os.listdir(ICON_DIR)):
+        if not file_name.endswith(".svg"):
+            continue
+
+        svg_path = os.path.join(ICON_DIR, file_name)
+        for size in ICON_SIZES:
+            png_path = prerendered_path(svg_path, size)
+            cairosvg.svg2png(url=svg_path, write_to=png_path, output_width=size, output_height=size)
+            print(f"🖼️ {file_name} -> {os.path.relpath(png_path, ICON_DIR)}")
+
+
+if __name__ == "__main__":
+    prerender_icons()
@@ -1,6 +1,8 @@
 import os
+import importlib.util
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # PiSugar setup
 PISUGAR_SERVICE = "pisugar-server"
@@ -31,19 +33,33 @@ SYSTEM_PACKAGES = [
 # Required Python packages
 PYTHON_PACKAGES = ["spidev"]
 
+# Icons pre-rendered to PNG so the display never needs CairoSVG at runtime
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+ICON_PNG_DIR = os.path.join(PROJECT_DIR, "assets", "icons", "png")
+PRERENDER_SCRIPT = os.path.join(PROJECT_DIR, "scripts", "prerender_icons.py")
 
-def is_installed(package):
-    """Check if a system package is installed."""
+
+def get_installed_packages():
+    """Return the names of all installed system packages (one dpkg-query call)."""
     try:
-        subprocess.run(["dpkg", "-s", package], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        return True
-    except subprocess.CalledProcessError:
-        return False
+        output = subprocess.run(
+            ["dpkg-query", "-W", "-f=${Package}\t${Status}\n"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return set()
+
+    return {
+        line.split("\t", 1)[0]
+        for line in output.splitlines()
+        if line.endswith("install ok installed")
+    }
 
 
 def install_system_packages():
     """Ensure all required system packages are installed."""
-    missing_packages = [pkg for pkg in SYSTEM_PACKAGES if not is_installed(pkg)]
+    installed = get_installed_packages()
+    missing_packages = [pkg for pkg in SYSTEM_PACKAGES if pkg not in installed]
 
     if missing_packages:
         print(f"📦 Installing missing system packages: {', '.join(missing_packages)}")
@@ -54,7 +70,7 @@ def install_system_packages():
 
 def is_python_package_installed(package):
     """Check if a Python package is installed."""
-    return subprocess.run([sys.executable, "-c", f"import {package}"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+    return importlib.util.find_spec(package) is not None
 
 
 def install_python_packages():
@@ -68,6 +84,34 @@ def install_python_packages():
         print("✅ All Python packages are already installed.")
 
 
+def check_pillow_build():
+    """Warn if Pillow was built without libjpeg-turbo (SIMD JPEG decode on ARM)."""
+    try:
+        from PIL import features
+    except ImportError:
+        print("⚠️ Pillow is not installed yet; skipping image backend check.")
+        return
+
+    if features.check_feature("libjpeg_turbo"):
+        print("✅ Pillow is using libjpeg-turbo.")
+    else:
+        print("⚠️ Pillow was built without libjpeg-turbo; JPEG decoding will be slow. Prefer python3-pil from apt.")
+
+
+def prerender_icons():
+    """Pre-render the SVG icons to PNG if that has not been done yet."""
+    if os.path.isdir(ICON_PNG_DIR):
+        print("✅ Icons are already pre-rendered.")
+        return
+
+    if not is_python_package_installed("cairosvg"):
+        print("⚠️ cairosvg is not installed; icons will be rasterized at runtime. Install it and re-run setup to pre-render them.")
+        return
+
+    print("🖼️ Pre-rendering icons...")
+    subprocess.run([sys.executable, PRERENDER_SCRIPT], check=True)
+
+
 def get_architecture():
     """Detects system architecture (armhf for 32-bit, arm64 for 64-bit)."""
     return "arm64" if os.uname().machine == "aarch64" else "armhf"
@@ -94,17 +138,21 @@ def download_pisugar_debs():
 
     os.makedirs(PISUGAR_LIB_DIR, exist_ok=True)  # Ensure the lib folder exists
 
-    if not os.path.isfile(PISUGAR_SERVER_DEB):
-        print(f"⬇️ Downloading PiSugar Server: {pisugar_server_url}")
-        subprocess.run(["wget", "-O", PISUGAR_SERVER_DEB, pisugar_server_url], check=True)
-
-    if not os.path.isfile(PISUGAR_POWEROFF_DEB):
-        print(f"⬇️ Downloading PiSugar Poweroff: {pisugar_poweroff_url}")
-        subprocess.run(["wget", "-O", PISUGAR_POWEROFF_DEB, pisugar_poweroff_url], check=True)
+    downloads = [
+        ("Server", PISUGAR_SERVER_DEB, pisugar_server_url),
+        ("Poweroff", PISUGAR_POWEROFF_DEB, pisugar_poweroff_url),
+        ("Programmer", PISUGAR_PROGRAMMER_DEB, pisugar_programmer_url),
+    ]
+    missing = [(name, path, url) for name, path, url in downloads if not os.path.isfile(path)]
 
-    if not os.path.isfile(PISUGAR_PROGRAMMER_DEB):
-        print(f"⬇️ Downloading PiSugar Programmer: {pisugar_programmer_url}")
-        subprocess.run(["wget", "-O", PISUGAR_PROGRAMMER_DEB, pisugar_programmer_url], check=True)
+    # Download missing packages concurrently; result() re-raises any wget failure
+    with ThreadPoolExecutor(max_workers=len(downloads)) as executor:
+        futures = []
+        for name, path, url in missing:
+            print(f"⬇️ Downloading PiSugar {name}: {url}")
+            futures.append(executor.submit(subprocess.run, ["wget", "-q", "-O", path, url], check=True))
+        for future in futures:
+            future.result()
 
 
 def is_pisugar_installed():
@@ -157,6 +205,8 @@ def main():
     """Run setup checks before starting infoHUD."""
     print("🚀 Running infoHUD setup checks...")
     install_python_packages()
+    check_pillow_build()
+    prerender_icons()
     install_pisugar()
     print("✅ Setup complete!")
 
@@ -10,33 +10,27 @@
 ################################################################################
 
 import os
-import sys
-import logging
 import time
-import cairosvg
-import logging.handlers
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import MappingProxyType
 from PIL import Image, ImageDraw, ImageFont, ImageOps
-from io import BytesIO  # Needed for SVG to PNG conversion
 
-# Ensure Python can find lib/
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../lib")))
-from waveshare_epd import epd4in0e  # Waveshare ePaper display
+from logging_setup import get_logger
+from icons import load_icon
+from image_fetcher import BODY_RESAMPLE  # ✅ One resample setting for prerendered and directly passed images
+from image_generator import SAVE_FRAMES  # ✅ One debug switch for every frame written to disk
+from waveshare_epd import epd4in0e  # Waveshare ePaper display (vendored in src/)
 
 # Configure logging
-LOG_DIR = "logs"
-TMP_DIR = "./tmp/generated"
+TMP_DIR = "./tmp/display"  # Full panel frames; image_generator keeps its own in ./tmp/generated
 MAX_IMAGES = 10
 
-os.makedirs(LOG_DIR, exist_ok=True)
-os.makedirs(TMP_DIR, exist_ok=True)
+if SAVE_FRAMES:
+    os.makedirs(TMP_DIR, exist_ok=True)
 
-log_file = os.path.join(LOG_DIR, "infoHUD.log")
-logger = logging.getLogger("display_manager")
-logger.setLevel(logging.INFO)
-handler = logging.handlers.TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7, utc=True)
-handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger = get_logger("display_manager")
 
 # Display settings
 DISPLAY_WIDTH = 600  # Landscape width
@@ -50,6 +44,31 @@ BODY_FONT_SIZE = 18  # ✅ Smaller font for text overlay on images
 ICON_SIZE = 48  # ✅ Weather icon size
 ICON_PADDING = 20  # ✅ Spacing between icon and temperature
 ICON_DIR = "./assets/icons/"  # ✅ Directory for weather icons
+UNKNOWN_ICON = "unknown.svg"
+
+# ePaper palette in the panel's color-index order (index 4 is unused by the panel)
+EPD_PALETTE = (0, 0, 0,  255, 255, 255,  255, 255, 0,  255, 0, 0,  0, 0, 0,  0, 0, 255,  0, 255, 0) + (0, 0, 0) * 249
+EPD_PALETTE_IMAGE = Image.new("P", (1, 1))
+EPD_PALETTE_IMAGE.putpalette(EPD_PALETTE)
+
+# Weather condition -> SVG icon file
+CONDITION_ICONS = MappingProxyType({
+    "Clear": "clear-day.svg",
+    "Sunny": "clear-day.svg",
+    "Partly cloudy": "cloudy-3-day.svg",
+    "Cloudy": "cloudy.svg",
+    "Overcast": "cloudy.svg",
+    "Rain": "rainy-3.svg",
+    "Light rain": "rainy-3-day.svg",
+    "Heavy rain": "rainy-3-night.svg",
+    "Thunderstorm": "thunderstorms.svg",
+    "Snow": "snowy-3.svg",
+    "Fog": "fog.svg",
+    "Haze": "haze.svg",
+    "Wind": "wind.svg",
+})
+CONDITION_ICON_PATHS = MappingProxyType({condition: os.path.join(ICON_DIR, name) for condition, name in CONDITION_ICONS.items()})
+UNKNOWN_ICON_PATH = os.path.join(ICON_DIR, UNKNOWN_ICON)
 
 
 class DisplayManager:
@@ -60,6 +79,29 @@ class DisplayManager:
         self.width, self.height = self.epd.width, self.epd.height
         self.header_font = ImageFont.truetype(FONT_PATH, HEADER_FONT_SIZE)
         self.body_font = ImageFont.truetype(FONT_PATH, BODY_FONT_SIZE)
+        self._header_text_widths = {}  # ✅ header_font is fixed, so widths are keyed by text alone
+
+        # ✅ Rasterize every weather icon up front so header renders are a dict lookup
+        self._icon_cache = {
+            name: load_icon(os.path.join(ICON_DIR, name), ICON_SIZE)
+            for name in set(CONDITION_ICONS.values()) | {UNKNOWN_ICON}
+        }
+
+        # ✅ Last rendered header and the inputs it was rendered from
+        self._header_cache_key = None
+        self._header_cache_img = None
+
+        # ✅ Last buffer sent to the panel
+        self._prev_buffer = None
+
+        # ✅ Canvases reused every refresh instead of reallocated
+        self._canvas = Image.new("RGB", (DISPLAY_HEIGHT, DISPLAY_WIDTH), (0, 0, 0))
+        self._header_img = Image.new("RGB", (DISPLAY_WIDTH, HEADER_HEIGHT), (0, 0, 0))
+        self._header_draw = ImageDraw.Draw(self._header_img)
+        self._body_img = Image.new("RGB", (DISPLAY_WIDTH, BODY_HEIGHT), (0, 0, 0))
+
+        # ✅ Single background worker for debug image writes
+        self._io_pool = ThreadPoolExecutor(max_workers=1) if SAVE_FRAMES else None
         logger.info(f"Display initialized with dimensions: {self.width}x{self.height}")
 
     def display_image(self, content, content_type, weather_data=None):
@@ -68,11 +110,18 @@ class DisplayManager:
             final_image = self._generate_table(content, weather_data)
 
             # ✅ Save for debugging
-            self._save_debug_image(final_image, content_type)
+            if SAVE_FRAMES:
+                self._save_debug_image(final_image, content_type)
 
             # ✅ Send to ePaper display
-            buffer = self.epd.getbuffer(final_image)
+            buffer = self._pack_buffer(final_image)
+            if buffer == self._prev_buffer:
+                # ✅ The panel has no partial refresh, so an unchanged frame skips the refresh entirely
+                logger.info(f"Frame unchanged, skipping refresh for {content_type}.")
+                return
+
             self.epd.display(buffer)
+            self._prev_buffer = buffer
             logger.info(f"Displayed {content_type} successfully.")
         except Exception as e:
             logger.error(f"Failed to display {content_type}: {e}")
@@ -80,40 +129,58 @@ class DisplayManager:
     def _generate_table(self, content, weather_data):
         """Creates a table layout for the display with a header (weather) and body (image)."""
         try:
-            # ✅ Create blank image in landscape mode (600x400)
-            display = Image.new("RGB", (DISPLAY_WIDTH, DISPLAY_HEIGHT), (0, 0, 0))
-
-            # ✅ Generate header (date/time/weather) - Place at the **top** BEFORE rotation
-            header = self._generate_header(weather_data)
-            display.paste(header, (0, 0))  # Header at the top
+            # ✅ Reuse the frame canvas in the panel's **portrait mode (400x600)**; body + header cover all of it
+            display = self._canvas
 
-            # ✅ Generate body (image content)
-            body = self._generate_body(content)
-            display.paste(body, (0, HEADER_HEIGHT))  # Body below the header
+            # ✅ Generate body (image content) - the landscape top-left lands at the portrait top-left
+            body = self._generate_body(content).transpose(Image.ROTATE_270)
+            display.paste(body, (0, 0))
 
-            # ✅ Rotate the entire display to **portrait mode (400x600)**
-            display = display.rotate(-90, expand=True)
+            # ✅ Generate header (date/time/weather) - the landscape top strip becomes the right-hand column
+            header = self._generate_header(weather_data)
+            display.paste(header, (BODY_HEIGHT, 0))
 
             return display
         except Exception as e:
             logger.error(f"Error generating table layout: {e}")
-            return Image.new("RGB", (DISPLAY_WIDTH, DISPLAY_HEIGHT), (0, 0, 0))  # Return blank image if rendering fails
+            return Image.new("RGB", (DISPLAY_HEIGHT, DISPLAY_WIDTH), (0, 0, 0))  # Return blank image if rendering fails
+
+    def _pack_buffer(self, image):
+        """Quantizes a frame to the panel palette and packs two 4-bit pixels per byte.
+
+        Same output as epd.getbuffer(), but the packing runs as one NumPy pass instead of a Python loop.
+        """
+        if image.size != (self.width, self.height):
+            return self.epd.getbuffer(image)  # ✅ Let the driver handle rotation of unexpected sizes
+
+        indices = np.asarray(image.convert("RGB").quantize(palette=EPD_PALETTE_IMAGE), dtype=np.uint8).reshape(-1)
+        return ((indices[0::2] << 4) | indices[1::2]).tobytes()
 
     def _generate_header(self, weather_data):
-        """Creates a structured header containing time, date, and weather icon + temperature."""
-        header = Image.new("RGB", (DISPLAY_WIDTH, HEADER_HEIGHT), (0, 0, 0))  # Black background
-        draw = ImageDraw.Draw(header)
+        """Creates a structured header containing time, date, and weather icon + temperature.
 
-        # ✅ Date & Time
-        current_time = datetime.now().strftime("%H:%M")
-        current_date = datetime.now().strftime("%d %b %y")
+        The header is laid out in landscape and returned already rotated for the portrait panel.
+        """
+        # ✅ Date & Time (one timestamp so both strings agree across a minute boundary)
+        now = datetime.now()
+        current_time = now.strftime("%H:%M")
+        current_date = now.strftime("%d %b %y")
 
         # ✅ Temperature & Condition
         temperature = "N/A"
         condition = "Unknown"
-        if weather_data and "current" in weather_data:
-            temperature = f"{weather_data['current'].get('temperature', 'N/A')}°F"
-            condition = weather_data['current'].get('condition', 'Unknown')
+        if weather_data:
+            temperature = f"{weather_data.current.temperature}°F"
+            condition = weather_data.current.condition
+
+        # ✅ Reuse the last header while the minute and weather are unchanged (callers only paste it)
+        cache_key = (current_time, current_date, temperature, condition)
+        if cache_key == self._header_cache_key:
+            return self._header_cache_img
+
+        header = self._header_img
+        draw = self._header_draw
+        draw.rectangle((0, 0, DISPLAY_WIDTH, HEADER_HEIGHT), fill=(0, 0, 0))  # Black background
 
         # ✅ Load weather icon instead of condition text
         icon_path = self._get_weather_icon_path(condition)
@@ -128,7 +195,7 @@ class DisplayManager:
         draw.text((DISPLAY_WIDTH // 2, text_y), current_time, font=self.header_font, fill="white", anchor="mm")  # Center-align
 
         # ✅ Place temperature & icon on the right side
-        temp_width = int(draw.textlength(temperature, font=self.header_font))
+        temp_width = self._header_text_width(temperature)
         total_width = ICON_SIZE + ICON_PADDING + temp_width
         right_x = DISPLAY_WIDTH - padding
 
@@ -139,45 +206,44 @@ class DisplayManager:
             icon_y = text_y - (ICON_SIZE // 2)  # Center vertically
             header.paste(weather_icon, (icon_x, icon_y), weather_icon)  # ✅ Properly place icon
 
+        # ✅ Rotate once per header change instead of rotating the full frame every refresh
+        header = header.transpose(Image.ROTATE_270)
+
+        self._header_cache_key = cache_key
+        self._header_cache_img = header
         return header
 
+    def _header_text_width(self, text):
+        """Returns the rendered width of header text, measuring each distinct string once."""
+        width = self._header_text_widths.get(text)
+        if width is None:
+            width = self._header_text_widths[text] = int(self.header_font.getlength(text))
+        return width
+
     def _get_weather_icon_path(self, condition):
         """Maps a weather condition to its corresponding SVG icon file path."""
-        condition_map = {
-            "Clear": "clear-day.svg",
-            "Sunny": "clear-day.svg",
-            "Partly cloudy": "cloudy-3-day.svg",
-            "Cloudy": "cloudy.svg",
-            "Overcast": "cloudy.svg",
-            "Rain": "rainy-3.svg",
-            "Light rain": "rainy-3-day.svg",
-            "Heavy rain": "rainy-3-night.svg",
-            "Thunderstorm": "thunderstorms.svg",
-            "Snow": "snowy-3.svg",
-            "Fog": "fog.svg",
-            "Haze": "haze.svg",
-            "Wind": "wind.svg",
-        }
-        return os.path.join(ICON_DIR, condition_map.get(condition, "unknown.svg"))
+        return CONDITION_ICON_PATHS.get(condition, UNKNOWN_ICON_PATH)
 
     def _load_svg_icon(self, icon_path):
-        """Loads an SVG file and converts it to a PIL image."""
-        if os.path.exists(icon_path):
-            try:
-                png_bytes = cairosvg.svg2png(url=icon_path, output_width=ICON_SIZE, output_height=ICON_SIZE)
-                return Image.open(BytesIO(png_bytes)).convert("RGBA")
-            except Exception as e:
-                logger.error(f"Failed to load weather icon: {e}")
-        return None
+        """Returns the pre-rasterized PIL image for an SVG icon path."""
+        icon = self._icon_cache.get(os.path.basename(icon_path))
+        if icon is None:
+            icon = load_icon(icon_path, ICON_SIZE)  # Not pre-loaded, or failed at startup; load_icon retries failures
+        return icon
 
     def _generate_body(self, image):
         """Places the image in the body section, ensuring it fills the space correctly."""
         try:
-            body = Image.new("RGB", (DISPLAY_WIDTH, BODY_HEIGHT), (0, 0, 0))  # Blank background
+            body = self._body_img
+            body.paste((0, 0, 0), (0, 0, DISPLAY_WIDTH, BODY_HEIGHT))  # Blank background
 
             if image:
-                image = ImageOps.exif_transpose(image)
-                image = image.resize((DISPLAY_WIDTH, BODY_HEIGHT), Image.LANCZOS)
+                if image.size != (DISPLAY_WIDTH, BODY_HEIGHT):  # ✅ ImageFetcher already delivers body-sized images
+                    image.draft("RGB", (DISPLAY_WIDTH, DISPLAY_WIDTH))  # ✅ JPEGs decode at reduced scale (square covers EXIF rotation)
+                    image = ImageOps.exif_transpose(image)
+                    image = image.resize((DISPLAY_WIDTH, BODY_HEIGHT), BODY_RESAMPLE)
+                if image.mode != "RGB":
+                    image = image.convert("RGB")  # ✅ Convert after resizing so it runs on the smaller image
                 body.paste(image, (0, 0))
             else:
                 logger.warning("No image received for the body section.")
@@ -192,24 +258,35 @@ class DisplayManager:
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         image_path = os.path.join(TMP_DIR, f"{image_type}_{timestamp}.png")
 
-        image.save(image_path)
-        logger.info(f"Debug image saved: {image_path}")
+        # ✅ Encode on the I/O thread so PNG compression overlaps the ePaper refresh
+        self._io_pool.submit(self._write_debug_image, image.copy(), image_path, image_type)
 
-        self._cleanup_old_images(image_type)
+    def _write_debug_image(self, image, image_path, image_type):
+        """Writes a debug image and trims old ones (runs on the I/O thread)."""
+        try:
+            image.save(image_path, compress_level=1)  # ✅ Fast DEFLATE; these are throwaway debug files
+            logger.info(f"Debug image saved: {image_path}")
+
+            self._cleanup_old_images(image_type)
+        except Exception as e:
+            logger.error(f"Failed to save debug image {image_path}: {e}")
 
     def _cleanup_old_images(self, image_type):
         """Deletes older images, keeping only the latest MAX_IMAGES."""
-        images = sorted([f for f in os.listdir(TMP_DIR) if f.startswith(image_type)], reverse=True)
+        with os.scandir(TMP_DIR) as entries:
+            images = [entry for entry in entries if entry.name.startswith(image_type)]
 
         if len(images) > MAX_IMAGES:
+            images.sort(key=lambda entry: entry.name, reverse=True)  # ✅ Timestamped names sort newest first
             for old_image in images[MAX_IMAGES:]:
-                os.remove(os.path.join(TMP_DIR, old_image))
-                logger.info(f"Deleted old {image_type} image: {old_image}")
+                os.remove(old_image.path)
+                logger.info(f"Deleted old {image_type} image: {old_image.name}")
 
     def clear_display(self):
         """Clears the ePaper display."""
         logger.info("Clearing display.")
         self.epd.Clear()
+        self._prev_buffer = None
 
     def sleep(self):
         """Puts the display into sleep mode to save power."""
@@ -0,0 +1,26 @@
+################################################################################
+# FILE: http_session.py
+# DESCRIPTION: Shared HTTP session for all infoHUD modules.
+# AUTHOR: MSCRNT LLC.
+#
+# THIS CODE IS PROPRIETARY PROPERTY OF MSCRNT LLC.
+################################################################################
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from functools import cache
+
+POOL_SIZE = 10  # Keep-alive connections kept per host
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.3  # Seconds, doubled on each retry
+
+@cache
+def get_session():
+    """Returns the process-wide session, so repeated requests reuse pooled keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                          max_retries=Retry(total=MAX_RETRIES, backoff_factor=RETRY_BACKOFF))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
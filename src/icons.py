@@ -0,0 +1,51 @@
+################################################################################
+# FILE: icons.py
+# DESCRIPTION: Loads SVG icons, preferring the PNGs from scripts/prerender_icons.py.
+# AUTHOR: MSCRNT LLC.
+#
+# THIS CODE IS PROPRIETARY PROPERTY OF MSCRNT LLC.
+################################################################################
+
+import os
+from functools import lru_cache
+from io import BytesIO
+from PIL import Image
+from logging_setup import get_logger
+
+logger = get_logger("icons")
+
+PNG_SUBDIR = "png"  # Pre-rendered icons live next to their SVGs in <icon dir>/png/
+
+def prerendered_path(svg_path, size):
+    """Returns the pre-rendered PNG path for an SVG icon at a size: <icon dir>/png/<name>_<size>.png."""
+    icon_dir, file_name = os.path.split(svg_path)
+    return os.path.join(icon_dir, PNG_SUBDIR, f"{os.path.splitext(file_name)[0]}_{size}.png")
+
+@lru_cache(maxsize=64)
+def _rasterize_icon(svg_path, size):
+    """Rasterizes an icon once per (path, size); failures raise and are therefore not cached."""
+    # ✅ Prefer the pre-rendered PNG; only fall back to CairoSVG when it is missing
+    png_path = prerendered_path(svg_path, size)
+    if os.path.exists(png_path):
+        with Image.open(png_path) as icon:
+            return icon.convert("RGBA")
+    if not os.path.exists(svg_path):
+        raise FileNotFoundError(svg_path)
+
+    import cairosvg  # ✅ Deferred: pulls in Cairo, only needed when a PNG has not been pre-rendered
+
+    png_bytes = cairosvg.svg2png(url=svg_path, output_width=size, output_height=size)
+    return Image.open(BytesIO(png_bytes)).convert("RGBA")  # ✅ convert() loads pixels, so the PNG buffer can be freed
+
+def load_icon(svg_path, size):
+    """Returns an SVG icon as a size x size RGBA image, or None if it can't be loaded (retried on the next call).
+
+    The returned image is shared between callers and must not be modified.
+    """
+    try:
+        return _rasterize_icon(svg_path, size)
+    except FileNotFoundError:
+        return None  # No such icon
+    except Exception as e:
+        logger.error(f"❌ Failed to load icon {svg_path}: {e}")
+        return None
@@ -7,30 +7,37 @@
 ################################################################################
 
 import os
-import logging
-import logging.handlers
-from PIL import Image
+import hashlib
+from PIL import Image, ImageOps
+from logging_setup import get_logger
 
 # Configure logging with single daily log file
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-log_file = os.path.join(LOG_DIR, "infoHUD.log")
-
-logger = logging.getLogger("image_fetcher")
-logger.setLevel(logging.INFO)
-handler = logging.handlers.TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7, utc=True)
-handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger = get_logger("image_fetcher")
 
 # Image directory
 IMAGE_DIR = "assets/images"
+PRERENDER_DIR = "./tmp/prerendered"  # Resized copies sized for the display body
+
+# Body area of the display (matches display_manager)
+DISPLAY_WIDTH = 600
+BODY_HEIGHT = 338
+HIGH_QUALITY_RESIZE = False  # ✅ Debug only: LANCZOS body resize (invisible after 7-color quantization)
+BODY_RESAMPLE = Image.LANCZOS if HIGH_QUALITY_RESIZE else Image.BILINEAR
 
 class ImageFetcher:
     def __init__(self):
         """Initialize the image fetcher."""
         self.image_files = self._get_image_files()
+        self._dir_mtime = self._get_dir_mtime()
         self.current_index = 0
 
+    def _get_dir_mtime(self):
+        """Return the image directory's mtime, or None if it is missing."""
+        try:
+            return os.stat(IMAGE_DIR).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
     def _get_image_files(self):
         """Retrieve a list of image files from the directory."""
         if not os.path.exists(IMAGE_DIR):
@@ -51,6 +58,15 @@ class ImageFetcher:
 
     def fetch_next_image(self):
         """Return the next image in the sequence."""
+        # Rescan only when files were added or removed since the last listing
+        dir_mtime = self._get_dir_mtime()
+        if dir_mtime != self._dir_mtime:
+            self.image_files = self._get_image_files()
+            self._dir_mtime = dir_mtime
+            self._prune_prerendered()
+            if self.current_index >= len(self.image_files):
+                self.current_index = 0
+
         if not self.image_files:
             logger.error("No images available to fetch.")
             return None
@@ -59,7 +75,70 @@ class ImageFetcher:
         self.current_index = (self.current_index + 1) % len(self.image_files)
 
         logger.info(f"Fetched image: {image_path}")
-        return Image.open(image_path)
+        return self._load_prerendered(image_path)
+
+    def _cache_path(self, image_path):
+        """Returns the prerendered file for an image's current path, mtime, the body size and resample filter."""
+        stat = os.stat(image_path)
+        cache_key = f"{os.path.abspath(image_path)}:{stat.st_mtime_ns}:{DISPLAY_WIDTH}x{BODY_HEIGHT}:{BODY_RESAMPLE}"
+        return os.path.join(PRERENDER_DIR, hashlib.sha1(cache_key.encode()).hexdigest() + ".png")
+
+    def _prune_prerendered(self):
+        """Deletes prerendered copies of images that were edited or removed since they were cached."""
+        if not os.path.isdir(PRERENDER_DIR):
+            return
+        keep = set()
+        for image_path in self.image_files:
+            try:
+                keep.add(os.path.basename(self._cache_path(image_path)))
+            except OSError:
+                continue  # Removed since the last scan; its copy is stale too
+        for name in os.listdir(PRERENDER_DIR):
+            if name not in keep:
+                try:
+                    os.remove(os.path.join(PRERENDER_DIR, name))
+                    logger.info(f"Removed stale resized image: {name}")
+                except OSError as e:
+                    logger.warning(f"Failed to remove stale resized image {name}: {e}")
+
+    def _load_prerendered(self, image_path):
+        """Returns the image resized for the display body, reusing a cached copy when the source is unchanged."""
+        try:
+            cache_path = self._cache_path(image_path)
+        except OSError as e:
+            logger.error(f"Failed to read image {image_path}: {e}")
+            return None
+
+        if os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as image:
+                    image.load()  # Read pixels now so the file handle is released
+                return image
+            except OSError as e:
+                logger.warning(f"Resized copy {cache_path} is unreadable, rebuilding: {e}")
+
+        # Only the resized copy outlives this block; the full-size decode is freed with the file
+        try:
+            with Image.open(image_path) as original:
+                original.draft("RGB", (DISPLAY_WIDTH, DISPLAY_WIDTH))  # JPEGs decode at reduced scale (square covers EXIF rotation)
+                # ✅ Convert before caching: CMYK/P/LA sources can't all be written as PNG
+                image = ImageOps.exif_transpose(original).convert("RGB")
+                image = image.resize((DISPLAY_WIDTH, BODY_HEIGHT), BODY_RESAMPLE)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load image {image_path}: {e}")
+            return None
+
+        try:
+            os.makedirs(PRERENDER_DIR, exist_ok=True)
+            image.save(cache_path)
+            logger.info(f"Cached resized image: {cache_path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to cache resized image for {image_path}: {e}")
+            return image  # Still show it, just resize again next time
+
+        # A new copy means a source was added or edited; drop copies no current image maps to
+        self._prune_prerendered()
+        return image
 
 if __name__ == "__main__":
     """Test the image fetcher by displaying the next image."""
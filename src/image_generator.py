@@ -9,22 +9,16 @@
 import os
 import time
 import logging
-import logging.handlers
-import requests
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
-import cairosvg
+from logging_setup import get_logger
+from icons import load_icon
 
 # Configure logging
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-log_file = os.path.join(LOG_DIR, "infoHUD.log")
-
-logger = logging.getLogger("image_generator")
-logger.setLevel(logging.DEBUG)
-handler = logging.handlers.TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7, utc=True)
-handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger = get_logger("image_generator", logging.DEBUG)
 
 # Display settings (600x400 for ePaper screen)
 DISPLAY_WIDTH = 600
@@ -38,11 +32,43 @@ MAX_IMAGES = 10  # Keep only the latest 10 images of each type
 ICON_SIZE = 40
 ICON_PADDING = 10
 ICON_DIR = "./assets/icons/"
-
+SAVE_FRAMES = os.getenv("SAVE_FRAMES", "False").lower() == "true"  # Keep generated frames on disk for debugging
+
+
+# 6-color palette for the Waveshare ePaper display, built once and reused by every conversion
+_PALETTE_BYTES = bytes([
+    0, 0, 0,       # BLACK
+    255, 255, 255, # WHITE
+    255, 255, 0,   # YELLOW
+    255, 0, 0,     # RED
+    0, 0, 255,     # BLUE
+    0, 255, 0      # GREEN
+] + [0, 0, 0] * 250)  # Fill rest of the palette with black
+_PAL_IMAGE = Image.new("P", (1, 1))
+_PAL_IMAGE.putpalette(_PALETTE_BYTES)
+
+# Palette index for each thresholded color: key = R<<2 | G<<1 | B, one bit per channel (>= 128).
+# In six of the eight octants the octant's own cube corner is a palette color, and it is the nearest one.
+# Cyan and magenta are not in the palette, so pixels in those octants are resolved by distance instead.
+_THRESHOLD_LUT = np.array([
+    0,  # 000 BLACK
+    4,  # 001 BLUE
+    5,  # 010 GREEN
+    1,  # 011 cyan    -> nearest (see _MIXED_KEYS)
+    3,  # 100 RED
+    1,  # 101 magenta -> nearest (see _MIXED_KEYS)
+    2,  # 110 YELLOW
+    1,  # 111 WHITE
+], dtype=np.uint8)
+_MIXED_KEYS = (0b011, 0b101)
+_PALETTE_RGB = np.frombuffer(_PALETTE_BYTES[:18], dtype=np.uint8).reshape(6, 3).astype(np.int32)
 
 # Ensure the generated image directory exists
 os.makedirs(TMP_DIR, exist_ok=True)
 
+# ✅ Single background writer so frame saves never block the display loop
+_save_pool = ThreadPoolExecutor(max_workers=1) if SAVE_FRAMES else None
+
 def cleanup_old_images(image_type):
     """Deletes older images, keeping only the latest MAX_IMAGES."""
     images = sorted([f for f in os.listdir(TMP_DIR) if f.startswith(image_type)], reverse=True)
@@ -52,88 +78,145 @@ def cleanup_old_images(image_type):
             os.remove(os.path.join(TMP_DIR, old_image))
             logger.info(f"Deleted old {image_type} image: {old_image}")
 
-def convert_to_6color(image):
+def convert_to_6color(image, dither=False):
     """Converts an image to the 6-color palette for Waveshare ePaper display."""
     logger.info("Converting image to 6-color mode.")
 
-    # Define the 6-color palette
-    pal_image = Image.new("P", (1, 1))
-    pal_image.putpalette([
-        0, 0, 0,       # BLACK
-        255, 255, 255, # WHITE
-        255, 255, 0,   # YELLOW
-        255, 0, 0,     # RED
-        0, 0, 255,     # BLUE
-        0, 255, 0      # GREEN
-    ] + [0, 0, 0] * 250)  # Fill rest of the palette with black
-
-    # Convert the image to the limited 6-color palette
-    converted_image = image.convert("RGB").quantize(palette=pal_image)
+    # ✅ convert() always copies, even when the mode already matches; every generator draws in RGB
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    if dither:
+        # Photographic content: Floyd-Steinberg against the cached palette avoids heavy banding
+        converted_image = image.quantize(palette=_PAL_IMAGE, dither=Image.FLOYDSTEINBERG)
+        logger.info("Image successfully converted to 6-color mode (dithered).")
+        return converted_image
+
+    # Flat layouts: threshold each channel to one bit and map the 3-bit key straight to a palette index
+    pixels = np.asarray(image)
+    bits = pixels >> 7
+    keys = (bits[..., 0] << 2) | (bits[..., 1] << 1) | bits[..., 2]
+    indices = _THRESHOLD_LUT[keys]
+
+    # Cyan/magenta octants have no palette corner: pick the nearest of the six colors for those pixels.
+    # Layouts use few distinct colors (e.g. the sky blue columns), so distances are computed once per color.
+    mixed = (keys == _MIXED_KEYS[0]) | (keys == _MIXED_KEYS[1])
+    if mixed.any():
+        rgb = pixels[mixed].astype(np.uint32)
+        colors, inverse = np.unique((rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2], return_inverse=True)
+        channels = np.stack([colors >> 16, (colors >> 8) & 0xFF, colors & 0xFF], axis=1).astype(np.int32)
+        diffs = channels[:, None, :] - _PALETTE_RGB
+        indices[mixed] = (diffs * diffs).sum(axis=2).argmin(axis=1)[inverse]
+
+    converted_image = Image.fromarray(indices)
+    converted_image.putpalette(_PALETTE_BYTES)  # "L" -> "P" with the 6-color palette
 
     logger.info("Image successfully converted to 6-color mode.")
     return converted_image
 
-def save_image(image, image_type):
-    """Converts image to 6-color mode, saves it, and cleans up old images."""
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    image_path = os.path.join(TMP_DIR, f"{image_type}_{timestamp}.png")
+def _write_frame(image, image_path, image_type):
+    """Writes a generated frame and trims old ones (runs on the save thread)."""
+    try:
+        image.save(image_path, bits=3)  # ✅ 6 colors fit a 4-bit PNG; optimize is skipped, the extra zlib pass costs more than it saves
+        logger.info(f"{image_type.capitalize()} image saved: {image_path}")
+
+        cleanup_old_images(image_type)
+    except Exception as e:
+        logger.error(f"Failed to save {image_type} image {image_path}: {e}")
 
+def save_image(image, image_type):
+    """Converts image to 6-color mode and, if SAVE_FRAMES is set, saves it in the background."""
     # Convert the image before saving
     image = convert_to_6color(image)
 
-    image.save(image_path)
-    logger.info(f"{image_type.capitalize()} image saved: {image_path}")
+    if SAVE_FRAMES:
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        image_path = os.path.join(TMP_DIR, f"{image_type}_{timestamp}.png")
+        _save_pool.submit(_write_frame, image.copy(), image_path, image_type)
 
-    cleanup_old_images(image_type)
     return image  # ✅ Return properly formatted image
 
+# Persistent RGB canvases keyed by size; generators run one at a time on the display loop
+_canvases = {}
+
+def _canvas(size, background):
+    """Returns the reusable RGB canvas for this size, cleared to the background color."""
+    image = _canvases.get(size)
+    if image is None:
+        image = _canvases[size] = Image.new("RGB", size, background)
+    else:
+        image.paste(background, (0, 0) + size)  # ✅ Fill in place instead of allocating a new frame
+    return image
+
+@lru_cache(maxsize=64)
+def _font(size, path=FONT_PATH):
+    """Returns a TrueType font, parsing each (size, path) only once."""
+    return ImageFont.truetype(path, size)
+
 def fit_text_to_width(text, max_width, font_path, max_font_size):
     """Dynamically adjusts font size to fit text within a given width."""
-    font_size = max_font_size
-    font = ImageFont.truetype(font_path, font_size)
-    while font.getsize(text)[0] > max_width and font_size > 10:
-        font_size -= 1
-        font = ImageFont.truetype(font_path, font_size)
-    return text, font
+    # ✅ Binary search for the largest size that fits, never going below 10
+    lo, hi = min(10, max_font_size), max_font_size
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _font(mid, font_path).getlength(text) <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text, _font(lo, font_path)
+
+def _wrap_text(text, max_width, font):
+    """Greedily wraps words into lines no wider than max_width."""
+    lines = []
+    line = ""
+    for word in text.split():
+        test_line = f"{line} {word}".strip()
+        if font.getlength(test_line) <= max_width:
+            line = test_line
+        else:
+            lines.append(line)
+            line = word
+    lines.append(line)
+    return lines
 
 def fit_text_to_area(text, max_width, max_height, font_path, max_font_size):
     """Dynamically adjusts font size to fit text within a given height."""
-    font_size = max_font_size
-    font = ImageFont.truetype(font_path, font_size)
-    lines = []
-    words = text.split()
-
-    while font_size > 10:
-        temp_lines = []
-        line = ""
-        for word in words:
-            test_line = f"{line} {word}".strip()
-            if font.getsize(test_line)[0] <= max_width:
-                line = test_line
-            else:
-                temp_lines.append(line)
-                line = word
-        temp_lines.append(line)
-
-        if sum(font.getsize(line)[1] for line in temp_lines) <= max_height:
-            lines = temp_lines
-            break
-
-        font_size -= 1
-        font = ImageFont.truetype(font_path, font_size)
-
-    return "\n".join(lines), font
-
-def _load_svg_icon(icon_name):
-    """Loads an SVG file and converts it to a PIL image."""
-    icon_path = os.path.join(ICON_DIR, icon_name)
-    if os.path.exists(icon_path):
-        try:
-            png_bytes = cairosvg.svg2png(url=icon_path, output_width=ICON_SIZE, output_height=ICON_SIZE)
-            return Image.open(BytesIO(png_bytes)).convert("RGBA")
-        except Exception as e:
-            logger.error(f"❌ Failed to load SVG icon {icon_name}: {e}")
-    return None  # Return None if icon is missing
+    def fits(size):
+        font = _font(size, font_path)
+        lines = _wrap_text(text, max_width, font)
+        return sum(font.getbbox(line)[3] for line in lines) <= max_height
+
+    # ✅ Binary search over [11, max_font_size]; text is dropped if nothing fits
+    lo, hi = 10, max_font_size
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+
+    if lo <= 10:
+        return "", _font(min(max_font_size, 10), font_path)
+
+    font = _font(lo, font_path)
+    return "\n".join(_wrap_text(text, max_width, font)), font
+
+@lru_cache(maxsize=32)
+def _flatten_icon(icon_name, background, size):
+    """Composites an icon onto a solid background once; a missing icon raises and is therefore not cached."""
+    icon = load_icon(os.path.join(ICON_DIR, icon_name), size)
+    if icon is None:
+        raise LookupError(icon_name)
+    flat = Image.new("RGB", icon.size, background)
+    flat.paste(icon, (0, 0), icon)  # ✅ Alpha blend happens once here instead of on every frame
+    return flat
+
+def _flat_icon(icon_name, background, size=ICON_SIZE):
+    """Returns an icon pre-composited onto a solid background as an RGB image, or None if it can't be loaded."""
+    try:
+        return _flatten_icon(icon_name, background, size)
+    except LookupError:
+        return None  # Retried on the next frame
 
 def generate_stock_image(stock_data):
     """Generates a properly formatted stock ticker image for a 600x338 display."""
@@ -147,9 +230,9 @@ def generate_stock_image(stock_data):
     BACKGROUND_COLOR = (0, 0, 0)  # Black background
 
     # **Create Image**
-    image = Image.new("RGB", (IMG_WIDTH, IMG_HEIGHT), BACKGROUND_COLOR)
+    image = _canvas((IMG_WIDTH, IMG_HEIGHT), BACKGROUND_COLOR)
     draw = ImageDraw.Draw(image)
-    font = ImageFont.truetype(FONT_PATH, FONT_SIZE)
+    font = _font(FONT_SIZE)
 
     # **Grid Layout for Stock Data**
     num_rows = 5
@@ -158,29 +241,31 @@ def generate_stock_image(stock_data):
     column_width = (IMG_WIDTH - (padding * (num_columns + 1))) // num_columns
     row_height = (IMG_HEIGHT - (padding * (num_rows + 1))) // num_rows
 
-    # **Draw Stock Data in Columns**
-    for index, stock in enumerate(stock_data[:10]):  # Limit to 10 stocks
-        col = index % num_columns
-        row = index // num_columns
-
-        if row >= num_rows:
-            break  # Prevents overflow
+    # **Format Columns Up Front** (symbols, prices, colors, changes for the visible rows)
+    visible = stock_data[:min(10, num_rows * num_columns)]  # Limit to 10 stocks, prevents overflow
+    symbols = [stock["symbol"] for stock in visible]
+    changes = [stock["change"] for stock in visible]
+    price_texts = [
+        f"{price:.2f}" if isinstance(price, (int, float)) else str(price)  # ✅ "No Data" passes through as-is
+        for price in (stock["current_price"] for stock in visible)
+    ]
+    price_colors = [(0, 255, 0) if change > 0 else (255, 0, 0) for change in changes]  # Green for gain, Red for loss
+    change_texts = [f"{change:.2f}" if change != 0.00 else None for change in changes]  # Only if Non-Zero
 
-        x_position = padding + col * (column_width + padding)
-        y_position = padding + row * (row_height + padding)
+    # **Draw Stock Data in Columns**
+    for index, symbol in enumerate(symbols):
+        x_position = padding + (index % num_columns) * (column_width + padding)
+        y_position = padding + (index // num_columns) * (row_height + padding)
 
         # **Stock Symbol**
-        draw.text((x_position, y_position), stock["symbol"], font=font, fill=(255, 255, 255))  # White text
+        draw.text((x_position, y_position), symbol, font=font, fill=(255, 255, 255))  # White text
 
         # **Current Price**
-        price_text = f"{stock['current_price']:.2f}"
-        price_color = (0, 255, 0) if stock["change"] > 0 else (255, 0, 0)  # Green for gain, Red for loss
-        draw.text((x_position + 150, y_position), price_text, font=font, fill=price_color)
+        draw.text((x_position + 150, y_position), price_texts[index], font=font, fill=price_colors[index])
 
-        # **Change in Value (Only if Non-Zero)**
-        if stock["change"] != 0.00:
-            change_text = f"{stock['change']:.2f}"
-            draw.text((x_position + 250, y_position), change_text, font=font, fill=(255, 255, 255))
+        # **Change in Value**
+        if change_texts[index]:
+            draw.text((x_position + 250, y_position), change_texts[index], font=font, fill=(255, 255, 255))
 
     logger.info("Stock ticker image generated successfully.")
 
@@ -196,13 +281,13 @@ def generate_news_image(news_data):
     logger.info("Generating news image for ePaper display.")
 
     # Create blank image with a dark background
-    image = Image.new("RGB", (DISPLAY_WIDTH, DISPLAY_HEIGHT), (0, 0, 0))
+    image = _canvas((DISPLAY_WIDTH, DISPLAY_HEIGHT), (0, 0, 0))
     draw = ImageDraw.Draw(image)
 
     # Font settings
     headline_font_size = FONT_SIZE * 2  # Adjusted for better balance
-    headline_font = ImageFont.truetype(FONT_PATH, headline_font_size)
-    summary_font = ImageFont.truetype(FONT_PATH, FONT_SIZE - 4)
+    headline_font = _font(headline_font_size)
+    summary_font = _font(FONT_SIZE - 4)
 
     # Layout configuration
     padding = 20
@@ -212,22 +297,26 @@ def generate_news_image(news_data):
     # **Step 1: Draw the Headline (Centered at the Top)**
     headline = news_data["title"]
     fitted_headline, headline_font = fit_text_to_width(headline, DISPLAY_WIDTH - 2 * padding, FONT_PATH, headline_font_size)
-    headline_width, headline_height = draw.textsize(fitted_headline, font=headline_font)
+    headline_width, headline_height = draw.textbbox((0, 0), fitted_headline, font=headline_font)[2:]
     headline_x = (DISPLAY_WIDTH - headline_width) // 2  # Center horizontally
 
     draw.text((headline_x, padding), fitted_headline, font=headline_font, fill=(255, 255, 255))
 
-    # **Step 2: Download and Display the Image (Left-Aligned)**
+    # **Step 2: Display the Image (Left-Aligned)**
     image_y_position = padding + headline_height + 10  # Place image below headline
-    if news_data.get("thumbnail_url"):
+    thumbnail_bytes = news_data.get("thumbnail")  # ✅ Downloaded by news_fetcher alongside the summary (None if it failed)
+    if thumbnail_bytes:
         try:
-            response = requests.get(news_data["thumbnail_url"], timeout=5)
-            response.raise_for_status()
-            thumbnail = Image.open(BytesIO(response.content)).convert("RGB")
-            thumbnail = thumbnail.resize(image_size, Image.LANCZOS)
+            thumbnail = Image.open(BytesIO(thumbnail_bytes))
+            thumbnail.draft("RGB", (image_size[0] * 2, image_size[1] * 2))  # ✅ JPEG: decode at reduced scale, no-op otherwise
+            if thumbnail.mode not in ("RGB", "RGBA"):
+                thumbnail = thumbnail.convert("RGB")
+            thumbnail = thumbnail.resize(image_size, Image.BILINEAR)  # Output is quantized to 6 colors, LANCZOS buys nothing
+            # ✅ Dither only the photo; its pixels are then exact palette colors the frame-wide threshold keeps as-is
+            thumbnail = convert_to_6color(thumbnail, dither=True).convert("RGB")
             image.paste(thumbnail, (padding, image_y_position))  # Left-aligned
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Failed to fetch news thumbnail: {e}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to decode news thumbnail: {e}")
 
     # **Step 3: Fit Summary to Available Space (Right of Image)**
     summary_x_start = padding + image_size[0] + 20
@@ -252,7 +341,7 @@ def generate_news_image(news_data):
 
 def generate_weather_image(weather_data):
     """Generates a 3-day weather forecast image for ePaper display using color SVG icons."""
-    if "forecast" not in weather_data or len(weather_data["forecast"]) < 3:
+    if len(weather_data.forecast) < 3:
         logger.warning("⚠️ Insufficient forecast data to generate weather image.")
         return None
 
@@ -272,14 +361,14 @@ def generate_weather_image(weather_data):
     }
 
     # ✅ Use RGB Mode for Color Support
-    image = Image.new("RGB", (IMG_WIDTH, IMG_HEIGHT), (255, 255, 255))  # ✅ White background
+    image = _canvas((IMG_WIDTH, IMG_HEIGHT), (255, 255, 255))  # ✅ White background
     draw = ImageDraw.Draw(image)
 
     try:
-        font = ImageFont.truetype(FONT_PATH, FONT_SIZE)
-        small_font = ImageFont.truetype(FONT_PATH, FONT_SIZE - 4)
-        moon_font = ImageFont.truetype(FONT_PATH, int(FONT_SIZE // 1.75))
-        day_font = ImageFont.truetype(FONT_PATH, int(FONT_SIZE * 1.10))
+        font = _font(FONT_SIZE)
+        small_font = _font(FONT_SIZE - 4)
+        moon_font = _font(int(FONT_SIZE // 1.75))
+        day_font = _font(int(FONT_SIZE * 1.10))
 
         # **Title (Properly Centered, Black Color)**
         title_text = "3-Day Forecast"
@@ -297,7 +386,7 @@ def generate_weather_image(weather_data):
         total_table_width = (col_width * num_columns) + (col_spacing * (num_columns - 1))
         table_start_x = (IMG_WIDTH - total_table_width) // 2  # ✅ Center table horizontally
 
-        for i, day in enumerate(weather_data["forecast"][:3]):
+        for i, day in enumerate(weather_data.forecast[:3]):
             x_pos = table_start_x + (i * (col_width + col_spacing))  # ✅ Evenly distribute columns
             column_center = x_pos + (col_width // 2)
 
@@ -307,14 +396,14 @@ def generate_weather_image(weather_data):
             draw.rectangle([x_pos, 40, x_pos + col_width, IMG_HEIGHT - 10], fill=SKY_BLUE)  # ✅ Sky Blue Background for Columns
 
             # **Day Name (Properly Centered)**
-            day_text = day.get("date", "Unknown")
+            day_text = day.date
             day_bbox = draw.textbbox((0, 0), day_text, font=day_font)
             day_width, day_height = day_bbox[2] - day_bbox[0], day_bbox[3] - day_bbox[1]
             draw.text((column_center - (day_width // 2), 50), day_text, font=day_font, fill=(0, 0, 0))
 
             # **High/Low Temps (Properly Centered Below Date)**
-            high_temp_text = f"H: {day.get('high_temp', 'N/A')}°F"
-            low_temp_text = f"L: {day.get('low_temp', 'N/A')}°F"
+            high_temp_text = f"H: {day.high_temp}°F"
+            low_temp_text = f"L: {day.low_temp}°F"
 
             temp_bbox = draw.textbbox((0, 0), high_temp_text, font=small_font)
             temp_width = temp_bbox[2] - temp_bbox[0]
@@ -322,28 +411,29 @@ def generate_weather_image(weather_data):
             draw.text((column_center - (temp_width // 2), 120), low_temp_text, font=small_font, fill=(0, 0, 255))
 
             # **Sunrise Icon & Text (Aligned Left, Different Font Color)**
-            sunrise_icon = _load_svg_icon("sunrise.svg")
+            # ✅ Icons sit entirely inside the sky blue column, so they are pre-flattened onto it
+            sunrise_icon = _flat_icon("sunrise.svg", SKY_BLUE)
             if sunrise_icon:
                 sunrise_x = x_pos + 10
-                image.paste(sunrise_icon, (sunrise_x, 160), sunrise_icon)
-            draw.text((sunrise_x + ICON_SIZE + 5, 170), day.get("sunrise", "N/A"), font=small_font, fill=(255, 69, 0))  # 🔶 Darker Orange Sunrise
+                image.paste(sunrise_icon, (sunrise_x, 160))
+            draw.text((sunrise_x + ICON_SIZE + 5, 170), day.sunrise, font=small_font, fill=(255, 69, 0))  # 🔶 Darker Orange Sunrise
 
             # **Sunset Icon & Text (Aligned Left, Different Font Color)**
-            sunset_icon = _load_svg_icon("sunset.svg")
+            sunset_icon = _flat_icon("sunset.svg", SKY_BLUE)
             if sunset_icon:
                 sunset_x = x_pos + 10
-                image.paste(sunset_icon, (sunset_x, 200), sunset_icon)
-            draw.text((sunset_x + ICON_SIZE + 5, 210), day.get("sunset", "N/A"), font=small_font, fill=(102, 51, 153))  # ✅ Dark Orchid for Sunset
+                image.paste(sunset_icon, (sunset_x, 200))
+            draw.text((sunset_x + ICON_SIZE + 5, 210), day.sunset, font=small_font, fill=(102, 51, 153))  # ✅ Dark Orchid for Sunset
 
             # **Moon Phase Icon (Now Below Sunset)**
-            moon_phase_name = day.get("moon_phase", "").split()[0].upper().replace(" ", "_")
-            moon_phase_icon = _load_svg_icon(moon_phase_map.get(moon_phase_name, "unknown.svg"))
+            moon_phase_name = day.moon_phase.split()[0].upper().replace(" ", "_")
+            moon_phase_icon = _flat_icon(moon_phase_map.get(moon_phase_name, "unknown.svg"), SKY_BLUE)
             if moon_phase_icon:
                 moon_x_pos = column_center - (ICON_SIZE // 2)
-                image.paste(moon_phase_icon, (moon_x_pos, 240), moon_phase_icon)
+                image.paste(moon_phase_icon, (moon_x_pos, 240))
 
             # **Moon Phase Name (Below Icon, 3x Smaller)**
-            moon_phase_text = day.get("moon_phase", "Unknown").replace("_", " ").title()
+            moon_phase_text = day.moon_phase.replace("_", " ").title()
             moon_text_bbox = draw.textbbox((0, 0), moon_phase_text, font=moon_font)
             moon_text_width = moon_text_bbox[2] - moon_text_bbox[0]
             draw.text((column_center - (moon_text_width // 2), 290), moon_phase_text, font=moon_font, fill=(0, 0, 0))
@@ -11,27 +11,23 @@ import logging
 import threading
 import os
 import json
+import hashlib
+import msgspec
 from dotenv import load_dotenv
+
+# Load environment variables from .env file (before the modules below read their settings)
+load_dotenv()
+
 from display_manager import DisplayManager
 from stock_ticker import fetch_stock_data
 from news_fetcher import fetch_news
 from image_fetcher import ImageFetcher
 from image_generator import generate_stock_image, generate_news_image, generate_weather_image
 import weather_fetcher
-
-# Load environment variables from .env file
-load_dotenv()
+from logging_setup import get_logger
 
 # Configure logging
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-log_file = os.path.join(LOG_DIR, "infoHUD.log")
-
-logger = logging.getLogger("infoHUD")
-logger.setLevel(logging.INFO)
-handler = logging.handlers.TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7, utc=True)
-handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger = get_logger("infoHUD")
 
 # Read enabled features from .env
 ENABLE_IMAGES = os.getenv("ENABLE_IMAGES", "True").lower() == "true"
@@ -52,6 +48,28 @@ WEATHER_DISPLAY_TIME = int(os.getenv("WEATHER_DISPLAY_TIME", 20))  # ✅ New for
 display_manager = DisplayManager()
 image_fetcher = ImageFetcher()
 
+# Last generated image per mode and a hash of the data it was generated from
+_last_key = {}
+_last_image = {}
+
+def _content_key(data):
+    """Hashes the content data so unchanged inputs can reuse the last generated image."""
+    payload = json.dumps(data, default=msgspec.to_builtins, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+def _generate_cached(mode, key_data, generate, data):
+    """Calls generate(data) only when key_data differs from the last cycle for this mode."""
+    key = _content_key(key_data)
+    if key == _last_key.get(mode):
+        logger.info(f"{mode.capitalize()} content unchanged, reusing last image.")
+        return _last_image[mode]
+
+    image = generate(data)
+    if image:
+        _last_key[mode] = key
+        _last_image[mode] = image
+    return image
+
 def fetch_and_prepare_content(mode):
     """Fetches content and prepares it for display."""
     logger.info(f"Fetching and preparing content: {mode}")
@@ -59,15 +77,19 @@ def fetch_and_prepare_content(mode):
     if mode == "stock" and ENABLE_STOCKS:
         stock_data = fetch_stock_data()
         if stock_data:
-            stock_image = generate_stock_image(stock_data)
+            stock_image = _generate_cached("stock", stock_data, generate_stock_image, stock_data)
             if stock_image:
                 return stock_image, "stock"
 
     elif mode == "news" and ENABLE_NEWS:
         news_data = fetch_news()
         if news_data:
-            logger.debug(f"News data sent to image generator:\n{json.dumps(news_data, indent=2)}")
-            news_image = generate_news_image(news_data)
+            if logger.isEnabledFor(logging.DEBUG):  # ✅ Skip the JSON dump entirely unless DEBUG is on
+                logger.debug("News data sent to image generator:\n%s", json.dumps(news_data, indent=2, default=lambda b: f"<{len(b)} bytes>"))
+            # ✅ Thumbnail bytes are left out of the key; the URL identifies the picture.
+            # Whether the download succeeded is kept in, so a frame missing its picture is redrawn once it arrives.
+            news_key = (news_data["title"], news_data["summary"], news_data.get("thumbnail_url"), news_data.get("thumbnail") is not None)
+            news_image = _generate_cached("news", news_key, generate_news_image, news_data)
             if news_image:
                 return news_image, "news"
 
@@ -79,7 +101,7 @@ def fetch_and_prepare_content(mode):
     elif mode == "weather" and ENABLE_WEATHER:
         weather_data = weather_fetcher.get_weather(LOCATION)  # ✅ Fetch latest weather
         if weather_data:
-            weather_image = generate_weather_image(weather_data)  # ✅ Generate forecast image
+            weather_image = _generate_cached("weather", weather_data, generate_weather_image, weather_data)  # ✅ Generate forecast image
             if weather_image:
                 return weather_image, "weather", weather_data  # ✅ Pass weather data
 
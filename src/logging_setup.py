@@ -0,0 +1,42 @@
+################################################################################
+# FILE: logging_setup.py
+# DESCRIPTION: Shared logging configuration for all infoHUD modules.
+# AUTHOR: MSCRNT LLC.
+#
+# THIS CODE IS PROPRIETARY PROPERTY OF MSCRNT LLC.
+################################################################################
+
+import os
+import logging
+import logging.handlers
+from functools import cache
+
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "infoHUD.log")
+
+@cache
+def _file_handler():
+    """Builds the shared rotating file handler the first time something is logged."""
+    if not os.path.isdir(LOG_DIR):
+        os.makedirs(LOG_DIR)
+    handler = logging.handlers.TimedRotatingFileHandler(LOG_FILE, when="midnight", interval=1, backupCount=7, utc=True, delay=True)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    return handler
+
+class _LazyFileHandler(logging.Handler):
+    """Forwards records to the shared file handler, creating it on first use."""
+
+    def emit(self, record):
+        _file_handler().handle(record)
+
+# ✅ One handler for the whole process, so a single file descriptor rotates infoHUD.log at midnight.
+# Importing a module no longer touches the disk; the log file is opened by the first record.
+_handler = _LazyFileHandler()
+
+def get_logger(name, level=logging.INFO):
+    """Returns a named logger that writes to the shared daily log file."""
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+    return logger
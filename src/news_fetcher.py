@@ -10,32 +10,53 @@ import feedparser
 import requests
 from bs4 import BeautifulSoup  # Ensure this is installed: pip install beautifulsoup4
 import logging
-import logging.handlers
-import json
-import os
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logging_setup import get_logger
+from http_session import get_session
 
 # Configure logging (consistent with infoHUD.py)
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-log_file = os.path.join(LOG_DIR, "infoHUD.log")
-
-logger = logging.getLogger("news_fetcher")
-logger.setLevel(logging.INFO)
-handler = logging.handlers.TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7, utc=True)
-handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger = get_logger("news_fetcher")
 
 # News RSS Feed
 RSS_FEED_URL = "https://feedx.net/rss/ap.xml"
 OLLAMA_SERVER_URL = "http://192.168.69.197:11434/api/generate"  # Ollama API endpoint
 OLLAMA_TIMEOUT = 10  # Increased timeout to 10 seconds
+THUMBNAIL_TIMEOUT = 5
+SUMMARY_CACHE_SIZE = 32  # Recent Ollama summaries kept in memory, keyed by article text hash
+
+# Validators and parsed result from the last full feed download
+_feed_etag = None
+_feed_modified = None
+_cached_feed = None
+
+# LRU of text hash -> Ollama summary
+_summary_cache = OrderedDict()
+
+def _fetch_feed():
+    """Fetch the RSS feed, reusing the last parsed copy when the server replies 304 Not Modified."""
+    global _feed_etag, _feed_modified, _cached_feed
+
+    feed = feedparser.parse(RSS_FEED_URL, etag=_feed_etag, modified=_feed_modified)
+
+    if feed.get("status") == 304 and _cached_feed is not None:
+        logger.info("RSS feed not modified, reusing cached copy.")
+        return _cached_feed
+
+    if feed.entries:
+        _feed_etag = feed.get("etag")
+        _feed_modified = feed.get("modified")
+        _cached_feed = feed
+
+    return feed
 
 def fetch_news():
     """Fetch the top news article from the RSS feed and process it for display."""
     logger.info("Fetching latest news article from RSS feed.")
 
     try:
-        feed = feedparser.parse(RSS_FEED_URL)
+        feed = _fetch_feed()
 
         if not feed.entries:
             logger.error("No news articles found in RSS feed.")
@@ -46,23 +67,31 @@ def fetch_news():
         summary = extract_rss_summary(entry)  # Extract full summary
         image_url = extract_image_url(entry.description)  # Extract image URL
 
-        logger.debug(f"Extracted raw summary: {summary}")
+        logger.debug("Extracted raw summary: %s", summary)
 
         if not summary or len(summary.split()) < 5:
             logger.error("No valid news content extracted. Aborting fetch.")
             return None
 
-        # Send the **original summary** to Ollama for refinement
-        shortened_summary = summarize_text(summary)  
+        # ✅ Download the thumbnail while Ollama works on the summary
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            thumbnail_future = executor.submit(fetch_thumbnail, image_url) if image_url else None
+
+            # Send the **original summary** to Ollama for refinement
+            shortened_summary = summarize_text(summary)
+
+            thumbnail = thumbnail_future.result() if thumbnail_future else None
 
         news_data = {
             "title": title,
             "summary": shortened_summary,
-            "thumbnail_url": image_url
+            "thumbnail_url": image_url,
+            "thumbnail": thumbnail
         }
 
         logger.info(f"News article fetched: {title}")
-        logger.debug(f"Final processed news data: {news_data}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Final processed news data: %s", {k: v for k, v in news_data.items() if k != "thumbnail"})
 
         return news_data
 
@@ -81,7 +110,7 @@ def extract_rss_summary(entry):
 
             if paragraphs:
                 original_summary = "\n\n".join(paragraphs)  # Preserve full structure
-                logger.debug(f"Extracted original summary from RSS: {original_summary}")
+                logger.debug("Extracted original summary from RSS: %s", original_summary)
                 return original_summary
 
     except Exception as e:
@@ -96,29 +125,48 @@ def extract_image_url(html):
         img_tag = soup.find("img")
         image_url = img_tag["src"] if img_tag else None
 
-        logger.debug(f"Extracted image URL: {image_url}")
+        logger.debug("Extracted image URL: %s", image_url)
         return image_url
 
     except Exception as e:
         logger.error(f"Error extracting image URL: {e}")
         return None
 
+def fetch_thumbnail(image_url):
+    """Downloads the article thumbnail, returning the raw bytes or None on failure."""
+    try:
+        response = get_session().get(image_url, timeout=THUMBNAIL_TIMEOUT)
+        response.raise_for_status()
+        return response.content
+
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to fetch news thumbnail: {e}")
+        return None
+
 def summarize_text(text):
     """Uses Deepseek-R1 14B on Ollama to generate a concise summary, with a fallback to the original text."""
+    # ✅ The top article often stays the same for many cycles; skip Ollama when it has been summarized already
+    text_hash = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    cached_summary = _summary_cache.get(text_hash)
+    if cached_summary is not None:
+        _summary_cache.move_to_end(text_hash)
+        logger.info(f"Final summary used (cached): {cached_summary}")
+        return cached_summary
+
     logger.info("Summarizing news article with Ollama.")
 
     try:
-        response = requests.post(
+        response = get_session().post(
             OLLAMA_SERVER_URL,
-            json={"model": "deepseek-r1:14b", "prompt": f"Summarize this news article in one sentence:\n{text}"},
+            json={"model": "deepseek-r1:14b", "prompt": f"Summarize this news article in one sentence:\n{text}", "stream": False},
             timeout=OLLAMA_TIMEOUT
         )
 
-        logger.debug(f"Ollama raw response: {response.text}")
+        logger.debug("Ollama raw response: %s", response.text)
 
         if response.status_code == 200:
             try:
-                response_data = json.loads(response.text.strip().split("\n")[-1])  # Extract last JSON object
+                response_data = response.json()  # ✅ Non-streaming: one JSON object with the full response
                 ollama_summary = response_data.get("response", "").strip()
 
                 # Validate the response to prevent nonsense summaries
@@ -127,10 +175,15 @@ def summarize_text(text):
                     logger.info(f"Final summary used: {text}")
                     return text  # Fallback to original summary
 
+                # Only successful summaries are cached, so fallbacks are retried on the next cycle
+                _summary_cache[text_hash] = ollama_summary
+                if len(_summary_cache) > SUMMARY_CACHE_SIZE:
+                    _summary_cache.popitem(last=False)
+
                 logger.info(f"Final summary used: {ollama_summary}")
                 return ollama_summary
 
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 logger.error(f"JSON parsing error from Ollama: {e}")
                 logger.info(f"Final summary used: {text}")
                 return text  # Fallback to original summary
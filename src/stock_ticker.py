@@ -6,74 +6,82 @@
 # THIS CODE IS PROPRIETARY PROPERTY OF MSCRNT LLC.
 ################################################################################
 
-import os
-import logging
-import logging.handlers
-from stockdex import Ticker
+from logging_setup import get_logger
+from http_session import get_session
 
 # Configure logging with single daily log file
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-log_file = os.path.join(LOG_DIR, "infoHUD.log")
-
-logger = logging.getLogger("stock_ticker")
-logger.setLevel(logging.INFO)
-handler = logging.handlers.TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7, utc=True)
-handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger = get_logger("stock_ticker")
 
 # List of stocks to track (configurable)
 STOCK_SYMBOLS = ["RDDT", "TSLA", "MSFT", "NVDA", "TSM", "AMZN", "METV", "META", "CHPT", "TLRY"]  # Modify as needed
 
+# Yahoo spark endpoint returns price metadata for many symbols in one request (v7/quote now needs a crumb)
+YAHOO_SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0"}  # Yahoo rejects the default python-requests agent
+STOCK_TIMEOUT = 10
+
+def _no_data(symbol):
+    """Placeholder entry for a symbol without a usable quote."""
+    return {
+        "symbol": symbol,
+        "current_price": "No Data",
+        "change": 0,
+        "percent_change": 0,
+        "direction": ""
+    }
+
+def _parse_quote(symbol, meta):
+    """Build the display entry for one symbol from its spark metadata."""
+    current_price = meta.get("regularMarketPrice") if meta else None
+    prev_close = (meta.get("chartPreviousClose") or meta.get("previousClose")) if meta else None
+
+    if current_price is None:
+        logger.warning(f"No price data found for {symbol}, data: {meta}")
+        return _no_data(symbol)
+
+    if not prev_close:
+        prev_close = current_price
+
+    # Calculate price change
+    change = current_price - prev_close
+    percent_change = (change / prev_close) * 100 if prev_close > 0 else 0
+
+    # Determine up/down indicator
+    direction = "▲" if change > 0 else "▼"
+
+    logger.info(f"{symbol}: {current_price:.2f} ({direction} {change:.2f}, {percent_change:.2f}%)")
+    return {
+        "symbol": symbol,
+        "current_price": round(current_price, 2),
+        "change": round(change, 2),
+        "percent_change": round(percent_change, 2),
+        "direction": direction
+    }
+
 def fetch_stock_data():
     """Fetch stock price data and return in a structured format."""
-    stock_info = []
     try:
-        for symbol in STOCK_SYMBOLS:
-            ticker = Ticker(ticker=symbol)
-            logger.info(f"Fetching stock data for: {symbol}")
-
-            # Fetch stock price and previous close
-            price_data = ticker.yahoo_api_price(range='1d', dataGranularity='1d')
-
-            # Log raw response for debugging
-            logger.debug(f"Raw price data for {symbol}: {price_data}")
-
-            # Ensure proper column casing
-            price_data.columns = price_data.columns.str.lower()
-
-            # Validate response
-            if price_data is not None and not price_data.empty and "close" in price_data.columns:
-                current_price = price_data.iloc[-1]["close"]  # Get the latest closing price
-                prev_close = price_data.iloc[-2]["close"] if len(price_data) > 1 else current_price
-
-                # Calculate price change
-                change = current_price - prev_close
-                percent_change = (change / prev_close) * 100 if prev_close > 0 else 0
-
-                # Determine up/down indicator
-                direction = "▲" if change > 0 else "▼"
-
-                stock_info.append({
-                    "symbol": symbol,
-                    "current_price": round(current_price, 2),
-                    "change": round(change, 2),
-                    "percent_change": round(percent_change, 2),
-                    "direction": direction
-                })
-
-                logger.info(f"{symbol}: {current_price:.2f} ({direction} {change:.2f}, {percent_change:.2f}%)")
-            else:
-                logger.warning(f"No 'close' data found for {symbol}, data: {price_data}")
-                stock_info.append({
-                    "symbol": symbol,
-                    "current_price": "No Data",
-                    "change": 0,
-                    "percent_change": 0,
-                    "direction": ""
-                })
-
-        return stock_info
+        logger.info(f"Fetching stock data for: {', '.join(STOCK_SYMBOLS)}")
+
+        # ✅ One batched request for every symbol instead of one round trip each
+        response = get_session().get(
+            YAHOO_SPARK_URL,
+            params={"symbols": ",".join(STOCK_SYMBOLS), "range": "1d", "interval": "1d"},
+            headers=YAHOO_HEADERS,
+            timeout=STOCK_TIMEOUT
+        )
+        response.raise_for_status()
+        results = response.json()["spark"]["result"] or []
+
+        logger.debug("Raw spark data: %s", results)
+
+        meta_by_symbol = {}
+        for result in results:
+            series = result.get("response") or [{}]
+            meta_by_symbol[result.get("symbol")] = series[0].get("meta")
+
+        # Keep STOCK_SYMBOLS order; symbols missing from the response get a placeholder
+        return [_parse_quote(symbol, meta_by_symbol.get(symbol)) for symbol in STOCK_SYMBOLS]
 
     except Exception as e:
         logger.error(f"Failed to fetch stock data: {e}")
@@ -218,7 +218,7 @@ class EPD:
         
     def Clear(self, color=0x11):
         self.send_command(0x10)
-        self.send_data2([color] * int(self.height) * int(self.width/2))
+        self.send_data2(bytes([color]) * (int(self.height) * int(self.width/2)))
 
         self.TurnOnDisplay()
 
@@ -5,140 +5,423 @@
 ################################################################################
 
 import os
-import sys
-import json
+import time
 import logging
-import logging.handlers
 import asyncio
+import atexit
+import operator
+import threading
+import zlib
+import msgspec
 import python_weather
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Union
+from logging_setup import get_logger
 
-# Ensure Python can find lib/
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../lib")))
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so concurrent processes may both fetch
+    fcntl = None
 
 # Configure logging
-LOG_DIR = "logs"
 TMP_DIR = "tmp"  # ✅ Store cache in ./tmp
-os.makedirs(LOG_DIR, exist_ok=True)
-os.makedirs(TMP_DIR, exist_ok=True)
-log_file = os.path.join(LOG_DIR, "infoHUD.log")
+if not os.path.isdir(TMP_DIR):
+    os.makedirs(TMP_DIR)
+_TMP_DIR = os.path.abspath(TMP_DIR)  # Resolved once so cache paths don't depend on later chdir
 
-logger = logging.getLogger("weather_fetcher")
-logger.setLevel(logging.DEBUG)
-handler = logging.handlers.TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7, utc=True)
-handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger = get_logger("weather_fetcher", logging.DEBUG)
 
-CACHE_EXPIRY = timedelta(hours=1)  # Cache updates once per hour
+CACHE_EXPIRY = 3600  # Seconds; cache updates once per hour
+CACHE_JITTER = 0.10  # ±10% per location, so several locations don't all expire together
+NIGHT_HOURS = (22, 5)  # Local hours [start, end) when forecasts barely change
+NIGHT_EXPIRY_FACTOR = 3
 
+# Cache schema (MessagePack on disk); callers receive these structs directly
+# ✅ array_like: fields are encoded by position, so no key names are stored or matched on decode
+# ✅ frozen: one instance is shared by every caller until it expires, so it must not be modified
+class CurrentWeather(msgspec.Struct, array_like=True, frozen=True):
+    condition: str = "Unknown"
+    temperature: Union[int, str] = "N/A"
+    wind_speed: Union[int, str] = "N/A"
+    humidity: Union[int, str] = "N/A"
+
+class DailyForecast(msgspec.Struct, array_like=True, frozen=True):
+    date: str
+    high_temp: int
+    low_temp: int
+    sunrise: str
+    sunset: str
+    moon_phase: str
+    moon_illumination: int
+
+class WeatherCache(msgspec.Struct, array_like=True, frozen=True):
+    current: CurrentWeather
+    forecast: list[DailyForecast]  # Fetch time is the file's mtime
+
+# Returned when weather cannot be fetched or loaded
+_UNAVAILABLE = WeatherCache(current=CurrentWeather(condition="Unavailable"), forecast=[])
+
+FETCH_TIMEOUT = 30  # Seconds to wait on the background loop for a batch of fetches
+
+# location -> (time.monotonic() expiry, weather data)
+_MEM_CACHE = {}
+
+# location -> (_MEM_CACHE expiry it was built from, get_formatted_weather text)
+_FORMATTED = {}
+
+# Long-lived event loop thread and python_weather client, started on first fetch
+_loop = None
+_loop_thread = None
+_client = None
+_loop_lock = threading.Lock()
+
+_ENCODER = msgspec.msgpack.Encoder()
+_DECODER = msgspec.msgpack.Decoder(WeatherCache)
+
+_WEEKDAY = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+def _format_clock(t):
+    """Formats a time like strftime("%I:%M %p") without going through the locale-aware formatter."""
+    return f"{(t.hour - 1) % 12 + 1:02d}:{t.minute:02d} {'AM' if t.hour < 12 else 'PM'}"
+
+def _cache_ttl(location):
+    """Cache lifetime in seconds for a location: CACHE_EXPIRY with a stable per-location jitter, longer overnight."""
+    # ✅ Jitter comes from the location name rather than random(), so every read agrees on the same expiry
+    jitter = (zlib.crc32(location.encode("utf-8")) / 0xFFFFFFFF * 2 - 1) * CACHE_JITTER
+    ttl = CACHE_EXPIRY * (1 + jitter)
+
+    hour = time.localtime().tm_hour  # ✅ Plain struct_time field, no datetime object per cache check
+    if hour >= NIGHT_HOURS[0] or hour < NIGHT_HOURS[1]:
+        ttl *= NIGHT_EXPIRY_FACTOR
+    return ttl
+
+@lru_cache(maxsize=64)
 def get_cache_file(location):
-    """Generate a location-specific cache file name."""
+    """Generate a location-specific cache file name (computed once per location)."""
     safe_location = location.replace(" ", "_").replace(",", "").lower()
-    return os.path.join(TMP_DIR, f"weather_cache_{safe_location}.json")
+    return os.path.join(_TMP_DIR, f"weather_cache_{safe_location}.msgpack")
 
-async def fetch_weather(location):
-    """Fetches and formats weather data for infoHUD."""
+@contextmanager
+def _cache_lock(locations):
+    """Holds an exclusive file lock per location, so only one process fetches and writes it at a time."""
+    if fcntl is None:
+        yield
+        return
+    lock_files = []
     try:
-        logger.info(f"🌤️ Fetching weather for {location}...")
-        async with python_weather.Client(unit=python_weather.IMPERIAL) as client:
-            forecast = await client.get(location)
-
-            if not forecast:
-                logger.error(f"❌ API response for {location} is empty.")
-                return None
-
-            logger.debug(f"✅ Raw API response for {location}: {forecast}")
-
-            # Extract current weather details
-            current_temp = getattr(forecast, "temperature", "N/A")
-            current_condition = getattr(forecast, "description", "Unknown")
-            wind_speed = getattr(forecast, "wind_speed", "N/A")
-            humidity = getattr(forecast, "humidity", "N/A")
-
-            # ✅ Format weather data for infoHUD
-            weather_data = {
-                "current": {
-                    "condition": current_condition,
-                    "temperature": current_temp,
-                    "wind_speed": wind_speed,
-                    "humidity": humidity
-                },
-                "forecast": [],
-                "timestamp": datetime.now().isoformat()
-            }
-
-            # ✅ Extract 3-day forecast without `kind`
-            for daily in forecast.daily_forecasts[:3]:
-                daily_forecast = {
-                    "date": daily.date.strftime("%A") if hasattr(daily, "date") else "Unknown",
-                    "high_temp": daily.highest_temperature,
-                    "low_temp": daily.lowest_temperature,
-                    "sunrise": daily.sunrise.strftime("%I:%M %p") if hasattr(daily, "sunrise") and daily.sunrise else "N/A",
-                    "sunset": daily.sunset.strftime("%I:%M %p") if hasattr(daily, "sunset") and daily.sunset else "N/A",
-                    "moon_phase": f"{daily.moon_phase.name if hasattr(daily, 'moon_phase') else 'Unknown'}",
-                    "moon_illumination": daily.moon_illumination
-                }
-                weather_data["forecast"].append(daily_forecast)
-
-            # Cache data
-            cache_file = get_cache_file(location)
-            with open(cache_file, "w") as f:
-                json.dump(weather_data, f, indent=4)
-
-            logger.info(f"✅ Weather data formatted successfully for infoHUD.")
-            return weather_data
-    except Exception as e:
-        logger.warning(f"Failed to fetch weather for {location}: {e}")
+        for location in sorted(locations):  # ✅ Fixed order, so callers locking overlapping sets can't deadlock
+            lock_path = os.path.splitext(get_cache_file(location))[0] + ".lock"
+            try:
+                lock_file = open(lock_path, "w")
+            except OSError as e:
+                # Locking only avoids duplicate fetches; an unusable lock file must not stop the fetch itself
+                logger.warning("Could not lock %s, fetching without it: %s", lock_path, e)
+                continue
+            lock_files.append(lock_file)
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            except OSError as e:
+                logger.warning("Could not lock %s, fetching without it: %s", lock_path, e)
+        yield
+    finally:
+        for lock_file in lock_files:
+            lock_file.close()  # Closing the file releases its lock
+
+def _write_cache(cache_file, payload):
+    """Atomically writes an encoded cache payload to disk."""
+    # ✅ Write to a temp file and rename, so a crash mid-write never leaves a truncated cache behind
+    tmp_path = cache_file + ".tmp"
+    try:
+        with open(tmp_path, "wb", buffering=len(payload)) as f:  # ✅ Buffer sized to the payload: one write() syscall
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, cache_file)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _store_cache(cache_file, payload):
+    """Saves a fresh payload, only touching the mtime when it matches what is already cached."""
+    # ✅ Forecasts often come back unchanged after an hour; revalidate in place instead of rewriting + fsync
+    try:
+        with open(cache_file, "rb") as f:
+            unchanged = f.read() == payload
+    except FileNotFoundError:
+        unchanged = False
+
+    if unchanged:
+        os.utime(cache_file, None)
+        logger.info("Weather unchanged, refreshed cache timestamp: %s", cache_file)
+    else:
+        _write_cache(cache_file, payload)
+
+def _load_legacy_cache(location):
+    """Reads a JSON cache written before the MessagePack format, if one is still around."""
+    legacy_file = os.path.splitext(get_cache_file(location))[0] + ".json"
+    if not os.path.exists(legacy_file):
         return None
 
+    with open(legacy_file, "rb") as f:
+        legacy_data = msgspec.json.decode(f.read())
 
-def get_cached_weather(location):
-    """Returns cached weather data if it's valid (less than 1 hour old)."""
+    fetched_at = datetime.fromisoformat(legacy_data.pop("timestamp")).timestamp()
+    cache = WeatherCache(
+        current=CurrentWeather(**legacy_data["current"]),
+        forecast=[DailyForecast(**daily) for daily in legacy_data["forecast"]]
+    )
+
+    # ✅ One-shot migration: rewrite as MessagePack, carry the fetch time over as the mtime, drop the JSON file
     cache_file = get_cache_file(location)
+    _write_cache(cache_file, _ENCODER.encode(cache))
+    os.utime(cache_file, (fetched_at, fetched_at))
+    os.remove(legacy_file)
+    return cache, fetched_at
 
-    if not os.path.exists(cache_file):
-        logger.warning(f"Weather cache file does not exist for {location}.")
-        return None
+_CURRENT_FIELDS = operator.attrgetter("description", "temperature", "wind_speed", "humidity")
 
+def _current_weather(forecast):
+    """Builds CurrentWeather from a python_weather forecast."""
     try:
-        with open(cache_file, "r") as f:
-            weather_data = json.load(f)
+        condition, temperature, wind_speed, humidity = _CURRENT_FIELDS(forecast)
+    except AttributeError:
+        # Rare partial response: fall back field by field
+        return CurrentWeather(
+            condition=getattr(forecast, "description", "Unknown"),
+            temperature=getattr(forecast, "temperature", "N/A"),
+            wind_speed=getattr(forecast, "wind_speed", "N/A"),
+            humidity=getattr(forecast, "humidity", "N/A")
+        )
+    return CurrentWeather(condition=condition, temperature=temperature, wind_speed=wind_speed, humidity=humidity)
 
-        if not weather_data or "timestamp" not in weather_data:
-            logger.warning(f"Cache file for {location} is empty or corrupted.")
-            return None
+def _daily_forecast(daily):
+    """Builds DailyForecast from a python_weather daily forecast."""
+    # ✅ Attributes are almost always present, so direct access with try/except beats hasattr + lookup
+    try:
+        date = _WEEKDAY[daily.date.weekday()]
+    except AttributeError:
+        date = "Unknown"
+    try:
+        sunrise = _format_clock(daily.sunrise) if daily.sunrise else "N/A"
+    except AttributeError:
+        sunrise = "N/A"
+    try:
+        sunset = _format_clock(daily.sunset) if daily.sunset else "N/A"
+    except AttributeError:
+        sunset = "N/A"
+    try:
+        moon_phase = daily.moon_phase.name
+    except AttributeError:
+        moon_phase = "Unknown"
 
-        last_update = datetime.fromisoformat(weather_data["timestamp"])
-        if datetime.now() - last_update < CACHE_EXPIRY:
-            logger.info(f"Using cached weather data for {location}.")
-            return weather_data
-        else:
-            logger.info(f"Weather cache expired for {location}.")
+    return DailyForecast(
+        date=date,
+        high_temp=daily.highest_temperature,
+        low_temp=daily.lowest_temperature,
+        sunrise=sunrise,
+        sunset=sunset,
+        moon_phase=moon_phase,
+        moon_illumination=daily.moon_illumination
+    )
+
+async def _fetch_one(client, location):
+    """Fetches and formats weather data for one location using an open client."""
+    try:
+        logger.info("🌤️ Fetching weather for %s...", location)
+        forecast = await client.get(location)
+
+        if not forecast:
+            logger.error("❌ API response for %s is empty.", location)
             return None
+
+        if logger.isEnabledFor(logging.DEBUG):  # ✅ The forecast repr is large; only build it when it will be written
+            logger.debug("✅ Raw API response for %s: %s", location, forecast)
+
+        # Extract current weather details
+        current = _current_weather(forecast)
+
+        # ✅ Extract 3-day forecast without `kind`
+        daily_forecasts = [_daily_forecast(daily) for daily in forecast.daily_forecasts[:3]]
+
+        cache = WeatherCache(current=current, forecast=daily_forecasts)
+
+        # Cache data (✅ written on a worker thread so concurrent fetches keep the loop free)
+        await asyncio.to_thread(_store_cache, get_cache_file(location), _ENCODER.encode(cache))
+
+        logger.info("✅ Weather data formatted successfully for infoHUD.")
+        return cache
     except Exception as e:
-        logger.warning(f"⚠️ Failed to fetch weather for {location}: {e}")
+        logger.warning("Failed to fetch weather for %s: %s", location, e)
         return None
 
-def get_weather(location):
-    """Returns weather data from cache or fetches new data if needed."""
-    weather_data = get_cached_weather(location)
-    if weather_data is None:
-        logger.info(f"Fetching new weather data for {location}...")
-        weather_data = asyncio.run(fetch_weather(location))
+async def _fetch_many(client, locations):
+    """Fetches several locations concurrently over an open client."""
+    async with asyncio.TaskGroup() as tg:
+        tasks = {location: tg.create_task(_fetch_one(client, location)) for location in locations}
+    return {location: task.result() for location, task in tasks.items()}
+
+async def _open_client():
+    """Creates the shared client on the background loop."""
+    client = python_weather.Client(unit=python_weather.IMPERIAL)
+    return await client.__aenter__()
+
+def _get_loop():
+    """Starts the background event loop and shared client on first use."""
+    global _loop, _loop_thread, _client
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="weather_loop", daemon=True)
+            thread.start()
+            try:
+                _client = asyncio.run_coroutine_threadsafe(_open_client(), loop).result(timeout=FETCH_TIMEOUT)
+            except Exception:
+                loop.call_soon_threadsafe(loop.stop)
+                raise
+            _loop, _loop_thread = loop, thread
+            atexit.register(_shutdown_loop)
+    return _loop
+
+def _shutdown_loop():
+    """Closes the shared client and stops the background loop at interpreter exit."""
+    global _loop, _loop_thread, _client
+    with _loop_lock:
+        if _loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(_client.__aexit__(None, None, None), _loop).result(timeout=5)
+        except Exception as e:
+            logger.warning("Failed to close weather client: %s", e)
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop_thread.join(timeout=5)
+        _loop.close()
+        _loop = _loop_thread = _client = None
+
+
+def _read_cache(location):
+    """Returns (WeatherCache, age in seconds) from a fresh cache file, or (None, None)."""
+    cache_file = get_cache_file(location)
+
+    try:
+        # ✅ The file's mtime is the fetch time, so an expired cache is rejected without reading it
+        try:
+            fetched_at = os.stat(cache_file).st_mtime
+            cache = None
+        except FileNotFoundError:
+            legacy = _load_legacy_cache(location)
+            if legacy is None:
+                logger.warning("Weather cache file does not exist for %s.", location)
+                return None, None
+            cache, fetched_at = legacy
+
+        age = time.time() - fetched_at
+        if age >= _cache_ttl(location):
+            logger.info("Weather cache expired for %s.", location)
+            return None, None
 
-    if weather_data is None:
-        logger.warning(f"Weather data retrieval failed for {location}. Returning default placeholder.")
-        return {"current": {"condition": "Unavailable", "temperature": "N/A"}}
+        if cache is None:
+            with open(cache_file, "rb") as f:
+                cache = _DECODER.decode(f.read())
 
-    return weather_data
+        logger.info("Using cached weather data for %s.", location)
+        return cache, age
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        logger.warning("Cache file for %s is empty or corrupted: %s", location, e)
+        return None, None
+    except Exception as e:
+        logger.warning("⚠️ Failed to fetch weather for %s: %s", location, e)
+        return None, None
+
+def get_cached_weather(location):
+    """Returns cached weather data if it's still within its cache lifetime (about 1 hour, 3 overnight)."""
+    return _read_cache(location)[0]
+
+def get_weather_many(locations):
+    """Returns {location: WeatherCache} from memory or the disk cache, fetching any stale locations together."""
+    now = time.monotonic()
+    results = {}
+    ages = {}  # Age in seconds of data loaded from disk or fetched now; memory hits are not re-stored
+    stale = []
+    for location in dict.fromkeys(locations):
+        # ✅ Serve from memory while the data is fresh; the disk cache is only read on a cold start
+        entry = _MEM_CACHE.get(location)
+        if entry and entry[0] > now:
+            results[location] = entry[1]
+            continue
+
+        cache, age = _read_cache(location)
+        if cache is None:
+            stale.append(location)
+        else:
+            results[location] = cache
+            ages[location] = age
+
+    if stale:
+        # ✅ If another process (e.g. the debug CLI) is already fetching these, wait for it and use its result
+        with _cache_lock(stale):
+            pending = []
+            for location in stale:
+                cache, age = _read_cache(location)
+                if cache is None:
+                    pending.append(location)
+                else:
+                    results[location] = cache
+                    ages[location] = age
+            stale = pending
+
+            if stale:
+                logger.info("Fetching new weather data for %s...", ", ".join(stale))
+                try:
+                    # ✅ Reuse the long-lived loop and client instead of a new loop, session and handshake per refresh
+                    loop = _get_loop()
+                    future = asyncio.run_coroutine_threadsafe(_fetch_many(_client, stale), loop)
+                    try:
+                        results.update(future.result(timeout=FETCH_TIMEOUT))
+                    except Exception:
+                        future.cancel()
+                        raise
+                except Exception as e:
+                    logger.warning("Failed to fetch weather for %s: %s", ", ".join(stale), e)
+                    results.update(dict.fromkeys(stale))
+                ages.update(dict.fromkeys(stale, 0))
+
+    for location, age in ages.items():
+        cache = results[location]
+        if cache is None:
+            _MEM_CACHE.pop(location, None)
+            logger.warning("Weather data retrieval failed for %s. Returning default placeholder.", location)
+            results[location] = _UNAVAILABLE
+            continue
+
+        # Keep it in memory for whatever is left of its cache lifetime
+        _MEM_CACHE[location] = (time.monotonic() + _cache_ttl(location) - age, cache)
+
+    return results
+
+def get_weather(location):
+    """Returns weather data from memory, the disk cache, or fetches new data if needed."""
+    return get_weather_many([location])[location]
 
 def get_formatted_weather(location):
     """Returns a formatted string for display purposes (current conditions only)."""
-    weather_data = get_weather(location)
-    if weather_data and "current" in weather_data:
-        current = weather_data["current"]
-        return f"{current.get('condition', 'Unknown')} {current.get('temperature', 'N/A')}°F"
-    return "Weather Unavailable"
+    cache = get_weather(location)
+
+    # ✅ Format once per refresh: reuse the string while the in-memory entry it came from is unchanged
+    entry = _MEM_CACHE.get(location)
+    expiry = entry[0] if entry and entry[1] is cache else None
+    formatted = _FORMATTED.get(location)
+    if expiry is not None and formatted and formatted[0] == expiry:
+        return formatted[1]
+
+    # The decoded struct is already validated, so fields are read directly
+    text = f"{cache.current.condition} {cache.current.temperature}°F"
+
+    if expiry is not None:
+        _FORMATTED[location] = (expiry, text)
+    return text
 
 
 if __name__ == "__main__":
@@ -146,4 +429,6 @@ if __name__ == "__main__":
     test_location = "Irvine, CA 92618"
     print("Fetching weather for:", test_location)
     weather = get_weather(test_location)
-    print(json.dumps(weather, indent=4))
+    print(weather.current)
+    for daily in weather.forecast:
+        print(daily)